@@ -0,0 +1,54 @@
+from emoji_server import EmojiServer
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+def post(url: str, body: dict) -> dict:
+    req = urllib.request.Request(url, json.dumps(body).encode("utf-8"), {"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as resp:
+        return json.loads(resp.read())
+
+def runClient(baseUrl: str, path: str, batches: list) -> int:
+    queries = 0
+    for body in batches:
+        post(baseUrl + path, body)
+        queries += len(next(iter(body.values())))
+    return queries
+
+def bench(baseUrl: str, path: str, batches: list, clients: int):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        queries = sum(executor.map(lambda _: runClient(baseUrl, path, batches), range(clients)))
+    duration = time.perf_counter() - start
+    requests = clients * len(batches)
+    print(f"{path:<10} {clients:>3} clients: {requests / duration:>9.1f} requests/s {queries / duration:>11.1f} queries/s")
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Measures the throughput of the emoji server with concurrent clients.")
+    argParser.add_argument("filepath", help="path to the emoji-test.txt file")
+    argParser.add_argument("--font", help="path to the font, enables the coverage benchmark")
+    argParser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    argParser.add_argument("--batchSize", type=int, default=50)
+    argParser.add_argument("--batches", type=int, default=40)
+    args = argParser.parse_args()
+
+    server = EmojiServer(args.filepath, args.font, port=0)
+    threading.Thread(target=server.serveForever, daemon=True).start()
+    host, port = server.httpd.server_address[:2]
+    baseUrl = "http://" + host + ":" + str(port)
+
+    emoji = [e.emoji for e in server.state.result.emoji]
+    names = [e.name for e in server.state.result.emoji]
+    def genBatches(keys: list, field: str) -> list:
+        return [{field: [keys[(b * args.batchSize + i) % len(keys)] for i in range(args.batchSize)]} for b in range(args.batches)]
+
+    for clients in args.clients:
+        bench(baseUrl, "/lookup", genBatches(emoji, "emoji"), clients)
+        bench(baseUrl, "/search", genBatches(names, "queries"), clients)
+        if args.font:
+            bench(baseUrl, "/coverage", genBatches(emoji, "emoji"), clients)
+
+    server.shutdown()
@@ -1,4 +1,5 @@
-from enum import Enum
+from enum import Enum, IntFlag
+from bisect import bisect_right
 from datetime import datetime
 import time
 import requests
@@ -30,6 +31,90 @@ class Group(Enum):
     SYMBOLS = 8
     FLAGS = 9
 
+class CodePointRole(IntFlag):
+    NONE = 0
+    START = 1
+    BASE = 2
+    MODIFIER = 4
+    ZWJ = 8
+    VS16 = 16
+    REGIONAL_INDICATOR = 32
+    KEYCAP = 64
+    TAG = 128
+
+class EmojiCodePointTable:
+    """
+    A compact lookup table of all code points used by a list of emoji, meant as a fast prefilter for text scanners.
+
+    ...
+
+    Attributes
+    ----------
+    ranges : list
+        a sorted list of non overlapping (first, last, roles) tuples e.g. (0x1F3FB, 0x1F3FF, CodePointRole.MODIFIER | CodePointRole.START)
+
+    startBitmap : bytearray
+        a bitmap over all unicode code points (0x0 - 0x10FFFF) where bit cp is set in case cp can start an emoji
+
+    Methods
+    -------
+    canStartEmoji(cp)
+        returns True in case the code point is the first code point of at least one emoji
+
+    getRoles(cp)
+        returns the CodePointRole flags of the code point or CodePointRole.NONE in case it is not part of any emoji
+    """
+
+    def __init__(self, emoji: list):
+        roles = {}
+        for e in emoji:
+            for i, cp in enumerate(e.codePoints):
+                role = self.__getRole(cp)
+                if i == 0:
+                    role |= CodePointRole.START
+                roles[cp] = roles.get(cp, CodePointRole.NONE) | role
+
+        self.ranges = []
+        for cp in sorted(roles):
+            if self.ranges and self.ranges[-1][1] == cp - 1 and self.ranges[-1][2] == roles[cp]:
+                self.ranges[-1] = (self.ranges[-1][0], cp, roles[cp])
+            else:
+                self.ranges.append((cp, cp, roles[cp]))
+        self.__firsts = [r[0] for r in self.ranges]
+
+        self.startBitmap = bytearray(0x110000 >> 3)
+        for cp, role in roles.items():
+            if role & CodePointRole.START:
+                self.startBitmap[cp >> 3] |= 1 << (cp & 7)
+
+    def canStartEmoji(self, cp: int) -> bool:
+        return cp < 0x110000 and bool(self.startBitmap[cp >> 3] & (1 << (cp & 7)))
+
+    def getRoles(self, cp: int) -> CodePointRole:
+        i = bisect_right(self.__firsts, cp) - 1
+        if i >= 0 and cp <= self.ranges[i][1]:
+            return self.ranges[i][2]
+        return CodePointRole.NONE
+
+    def __getRole(self, cp: int) -> CodePointRole:
+        # 🏻 - 🏿 skin tone modifiers:
+        if 0x1F3FB <= cp <= 0x1F3FF:
+            return CodePointRole.MODIFIER
+        elif cp == 0x200D:
+            return CodePointRole.ZWJ
+        elif cp == 0xFE0F:
+            return CodePointRole.VS16
+        # 🇦 - 🇿 regional indicator symbols:
+        elif 0x1F1E6 <= cp <= 0x1F1FF:
+            return CodePointRole.REGIONAL_INDICATOR
+        # Combining enclosing keycap:
+        elif cp == 0x20E3:
+            return CodePointRole.KEYCAP
+        # Tag characters used by subdivision flags like "🏴󠁧󠁢󠁥󠁮󠁧󠁿":
+        elif 0xE0020 <= cp <= 0xE007F:
+            return CodePointRole.TAG
+        return CodePointRole.BASE
+
 class EmojiParseResult:
     """
     Holds the parse result on success.
@@ -52,6 +137,11 @@ class EmojiParseResult:
 
     dateSource : datetime
         the date and time object of the "emoji-test.txt" file creation
+
+    Methods
+    -------
+    getCodePointTable()
+        returns the EmojiCodePointTable for all found emoji, it gets built on the first call
     """
 
     def __init__(self, emoji: list, subgroups: list, versionMajor: int, versionMinor: int, dateSource: datetime):
@@ -60,6 +150,12 @@ class EmojiParseResult:
         self.versionMajor = versionMajor
         self.versionMinor = versionMinor
         self.dateSource = dateSource
+        self.__codePointTable = None
+
+    def getCodePointTable(self) -> EmojiCodePointTable:
+        if self.__codePointTable is None:
+            self.__codePointTable = EmojiCodePointTable(self.emoji)
+        return self.__codePointTable
 
 class Emoji:
     """
@@ -127,6 +223,9 @@ class EmojiParser:
     -------
     parse()
         downloads the emoji file specified in url and returns a EmojiParseResult object or None if the download failed
+
+    streamList()
+        yields the emoji file specified in url or filepath in text chunks while it is still being downloaded or read
     """
 
     def __init__(self, url: str=None, filepath: str=None):
@@ -135,23 +234,32 @@ class EmojiParser:
         self.url = url
         self.filepath = filepath
 
-    def parse(self) -> list:
+    def parse(self, onGroupParsed=None, lines=None) -> list:
         """
         Downloads the emoji file specified in url and returns a EmojiParseResult object or None if the download failed.
 
+        Parameters
+        ----------
+        onGroupParsed : callable, optional
+            gets called with the Group and a list of its Emoji objects as soon as the last emoji of this group got parsed
+
+        lines : iterable, optional
+            the lines of the "emoji-test.txt" file e.g. while they are still being downloaded, replaces url and filepath
+
         Returns
         -------
         list
             a list of Emoji objects if the download was successfull else None
         """
-        if self.filepath:
-            text = open(self.filepath).read()
-        else:
-            text = self.__downloadList()
-        if text is None:
-            return None
+        if lines is None:
+            if self.filepath:
+                text = open(self.filepath).read()
+            else:
+                text = self.__downloadList()
+            if text is None:
+                return None
+            lines = text.splitlines()
 
-        lines = text.splitlines()
         lines = self.__removeNotImpLines(lines)
 
         emoji = []
@@ -162,9 +270,13 @@ class EmojiParser:
         versionMajor = -1
         versionMinor = -1
         dateSource = time.gmtime(0)
+        groupStart = 0
         print("Started parsing emoji list...")
         for l in lines:
             if l.startswith("# group:"):
+                if onGroupParsed and group:
+                    onGroupParsed(group, emoji[groupStart:])
+                groupStart = len(emoji)
                 group = self.__parseGroup(l)
 
                 # Add the Windows 10 ninja cat emoji:
@@ -190,6 +302,8 @@ class EmojiParser:
                     emoji.append(e)
                     index += 1
 
+        if onGroupParsed and group:
+            onGroupParsed(group, emoji[groupStart:])
         print("Finished parsing emoji. Found " + str(len(emoji)) + " emoji in " + str(len(subgroups)) + " subgroups.")
         return EmojiParseResult(emoji, subgroups, versionMajor, versionMinor, dateSource)
 
@@ -294,15 +408,33 @@ class EmojiParser:
         print("Finished emoji list download.")
         return resp.text
 
-    def __removeNotImpLines(self, lines: list) -> list:
-        # Remove start comment:
-        result = []
-        for l in lines:
-            if not l.startswith("#") or l.startswith("# group:") or l.startswith("# subgroup:") or l.startswith("# Date:") or l.startswith("# Version:"):
-                result.append(l)
+    def streamList(self, chunkSize: int=64 * 1024):
+        """
+        Yields the emoji file specified in url or filepath as decoded text chunks while it is still being downloaded or read.
 
-        # Remove empty lines:
-        return [l for l in result if l]
+        Parameters
+        ----------
+        chunkSize : int
+            the maximum size of each chunk
+        """
+        if self.filepath:
+            with open(self.filepath) as f:
+                chunk = f.read(chunkSize)
+                while chunk:
+                    yield chunk
+                    chunk = f.read(chunkSize)
+        else:
+            print("Started emoji list download from: " + self.url)
+            with requests.get(self.url, stream=True) as resp:
+                # Never feed an error page into the parser:
+                resp.raise_for_status()
+                resp.encoding = "utf-8"
+                yield from resp.iter_content(chunkSize, decode_unicode=True)
+            print("Finished emoji list download.")
+
+    def __removeNotImpLines(self, lines):
+        # Remove start comment and empty lines (lazy, so streamed lines get parsed as soon as they arrive):
+        return (l for l in lines if l and (not l.startswith("#") or l.startswith("# group:") or l.startswith("# subgroup:") or l.startswith("# Date:") or l.startswith("# Version:")))
 
     def __parseGroup(self, s: str) -> Group:
         if "Smileys & Emotion" in s:
@@ -419,6 +551,15 @@ class EmojiParser:
             skinTones.append(SkinTone.NONE)
 
         # Search terms:
+        searchTerms = EmojiParser.genSearchTerms(name)
+
+        return Emoji(codePoints, emoji, name, searchTerms, skinTones, status, eNumber, group, subgroup, index)
+
+    @staticmethod
+    def genSearchTerms(name: str) -> list:
+        """
+        Normalizes an emoji name or search query into a list of lower case search terms e.g. "keycap: #" into ["keycap", "hash"].
+        """
         # Based on: https://github.com/neosmart/unicode.net/blob/3b0bd1867c96221b344084d8d82278f7c6a812b8/importers/emoji-importer.html#L13
         searchTermsS = re.sub(r"[,.'’“”!():]", "", name)
         searchTermsS = searchTermsS.replace("-", " ") \
@@ -432,6 +573,4 @@ class EmojiParser:
 
         # Based on: https://github.com/neosmart/unicode.net/blob/3b0bd1867c96221b344084d8d82278f7c6a812b8/importers/emoji-importer.html#L45
         unwanted =  ["of", "with", "without", "and", "or", "&", "-", "on", "the", "in"]
-        searchTerms = [l.lower() for l in searchTerms if not (l in unwanted)]
-
-        return Emoji(codePoints, emoji, name, searchTerms, skinTones, status, eNumber, group, subgroup, index)
\ No newline at end of file
+        return [l.lower() for l in searchTerms if not (l in unwanted)]
\ No newline at end of file
@@ -0,0 +1,224 @@
+from emoji_parser import EmojiParser, EmojiParseResult, Group
+from gen_c_sharp import GenCSharp
+from concurrent.futures import ThreadPoolExecutor
+import filecmp
+import os
+import queue
+import shutil
+import threading
+import time
+
+class EmojiPipeline:
+    """
+    Runs download, parsing, font coverage checking and code generation as overlapping stages instead of one after another.
+
+    The download thread streams the "emoji-test.txt" file in chunks into a bounded queue, the parse thread turns them into lines
+    and hands every group to a second bounded queue as soon as its last emoji got parsed.
+    The coverage thread checks the font coverage of each group and passes it on to a third bounded queue.
+    The calling thread then generates the "Emoji-Emojis-*.cs" shards and the group file of each group right away.
+    Only the files that need all emoji (Emoji-All.cs, Emoji-Basic.cs, ...) get generated once parsing finished.
+    Since declarations get generated per group, the pipeline always produces sharded declarations (see GenCSharp.genEmojiDeclarationsShards()).
+
+    All files get written to "<outDir>.tmp" first and only get moved to the output directory of the generator once every stage succeeded,
+    so a failed download or parse leaves the previous output untouched.
+
+    ...
+
+    Attributes
+    ----------
+    parser : EmojiParser
+        the parser used for downloading and parsing the "emoji-test.txt" file
+
+    gen : GenCSharp
+        the generator used for checking the font coverage and generating the C# files
+
+    maxShardSize : int
+        passed on to GenCSharp.splitEmojiDeclarationsShards()
+
+    queueSize : int
+        the maximum number of chunks and groups waiting between two stages
+
+    Methods
+    -------
+    run()
+        runs all stages and returns the EmojiParseResult once all files got generated
+    """
+
+    def __init__(self, parser: EmojiParser, gen: GenCSharp, maxShardSize: int=None, queueSize: int=4):
+        self.parser = parser
+        self.gen = gen
+        self.maxShardSize = maxShardSize
+        self.queueSize = queueSize
+
+    def run(self) -> EmojiParseResult:
+        outDir = self.gen.outDir
+        tmpDir = outDir + ".tmp"
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+        self.gen.outDir = tmpDir
+        try:
+            result, shards = self.__run()
+        except:
+            shutil.rmtree(tmpDir, ignore_errors=True)
+            raise
+        finally:
+            self.gen.outDir = outDir
+
+        changed = self.__moveChangedFiles(tmpDir, outDir, shards)
+        self.gen.removeStaleEmojiDeclarationsShards(shards)
+        print("Finished generating " + str(len(shards)) + " \"Emoji-Emojis-*.cs\" shards (" + str(changed) + " changed).")
+        print("Done generating all C# source code files!")
+        return result
+
+    def __run(self):
+        chunks = queue.Queue(self.queueSize)
+        groups = queue.Queue(self.queueSize)
+        covered = queue.Queue(self.queueSize)
+        errors = []
+        parsed = []
+        # Set on errors and once done, all stages stop waiting on their queues and return:
+        stop = threading.Event()
+        # Per stage [seconds spent, seconds spent waiting on queues]:
+        times = {stage: [0.0, 0.0] for stage in ("download", "parse", "coverage", "generate")}
+
+        def put(stage: str, q: queue.Queue, item) -> bool:
+            start = time.perf_counter()
+            try:
+                while not stop.is_set():
+                    try:
+                        q.put(item, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        pass
+                return False
+            finally:
+                times[stage][1] += time.perf_counter() - start
+
+        def get(stage: str, q: queue.Queue):
+            start = time.perf_counter()
+            try:
+                while not stop.is_set():
+                    try:
+                        return q.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+                return None
+            finally:
+                times[stage][1] += time.perf_counter() - start
+
+        def runStage(stage: str, target):
+            start = time.perf_counter()
+            try:
+                target()
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                times[stage][0] = time.perf_counter() - start
+
+        def download():
+            try:
+                for chunk in self.parser.streamList():
+                    if not put("download", chunks, chunk):
+                        break
+            finally:
+                put("download", chunks, None)
+
+        def parse():
+            try:
+                parsed.append(self.parser.parse(lambda group, emoji: put("parse", groups, (group, emoji)), self.__iterLines(lambda: get("parse", chunks))))
+            finally:
+                put("parse", groups, None)
+
+        def checkCoverage():
+            try:
+                item = get("coverage", groups)
+                while item is not None:
+                    # The results get cached, so the shard workers only have to render:
+                    for e in item[1]:
+                        self.gen.isEmojiSupportedByFont(e)
+                    put("coverage", covered, item)
+                    item = get("coverage", groups)
+            finally:
+                put("coverage", covered, None)
+
+        def generate():
+            with ThreadPoolExecutor() as executor:
+                item = get("generate", covered)
+                while item is not None:
+                    group, emoji = item
+                    groupShards = self.gen.splitEmojiDeclarationsShards(emoji, group, self.maxShardSize)
+                    for name, shardEmoji in groupShards.items():
+                        futures.append(executor.submit(self.gen.genEmojiDeclarationsShard, name, shardEmoji))
+                    shards.update(groupShards)
+                    self.gen.genEmojiGroupFile(EmojiParseResult(emoji, [], -1, -1, None), group)
+                    generatedGroups.add(group)
+                    item = get("generate", covered)
+                for f in futures:
+                    f.result()
+
+        shards = {}
+        futures = []
+        generatedGroups = set()
+        totalStart = time.perf_counter()
+        threads = [threading.Thread(target=runStage, args=(stage, target), daemon=True) for stage, target in (("download", download), ("parse", parse), ("coverage", checkCoverage))]
+        for t in threads:
+            t.start()
+        try:
+            runStage("generate", generate)
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+
+        if errors:
+            raise errors[0]
+        result = parsed[0]
+
+        finalStart = time.perf_counter()
+        # Subgroups.cs
+        self.gen.genSubgroupsFile(result)
+        # Emoji-All.cs
+        self.gen.genEmojiAllFile(result)
+        # Emoji-CodePoints.cs
+        self.gen.genCodePointsFile(result)
+        # Emoji-Basic.cs
+        self.gen.genEmojiBasicFile(result)
+
+        # Groups without a "# group:" header in the file never reach the queue, generate their (empty) group file anyway:
+        for group in Group:
+            if not group in generatedGroups:
+                self.gen.genEmojiGroupFile(result, group)
+        times["final"] = [time.perf_counter() - finalStart, 0.0]
+
+        print("Pipeline stage times (busy / waiting on queues): " + ", ".join(
+            stage + " " + "{:.2f}s / {:.2f}s".format(spent - waited, waited) for stage, (spent, waited) in times.items())
+            + ", total {:.2f}s".format(time.perf_counter() - totalStart))
+        return result, shards
+
+    def __moveChangedFiles(self, tmpDir: str, outDir: str, shards: dict) -> int:
+        # Keep unchanged files (and their timestamps) untouched so incremental builds skip them:
+        os.makedirs(outDir, exist_ok=True)
+        changed = 0
+        for name in os.listdir(tmpDir):
+            src = os.path.join(tmpDir, name)
+            dst = os.path.join(outDir, name)
+            if os.path.exists(dst) and filecmp.cmp(src, dst, shallow=False):
+                continue
+            os.replace(src, dst)
+            if name in shards:
+                changed += 1
+        shutil.rmtree(tmpDir, ignore_errors=True)
+        return changed
+
+    def __iterLines(self, getChunk):
+        rest = ""
+        chunk = getChunk()
+        while chunk is not None:
+            lines = (rest + chunk).split("\n")
+            rest = lines.pop()
+            for l in lines:
+                yield l.rstrip("\r")
+            chunk = getChunk()
+        if rest:
+            yield rest.rstrip("\r")
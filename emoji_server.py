@@ -0,0 +1,273 @@
+from emoji_parser import EmojiParser, EmojiParseResult, Emoji, Group
+from gen_c_sharp import GenCSharp
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import json
+import os
+import threading
+
+class EmojiServerState:
+    """
+    An immutable snapshot of a parsed "emoji-test.txt" file together with all indexes required for answering queries.
+
+    ...
+
+    Attributes
+    ----------
+    result : EmojiParseResult
+        the parse result this state is based on
+
+    fileStat : tuple
+        the (st_mtime_ns, st_size) of the source file at the time it got parsed
+    """
+
+    def __init__(self, result: EmojiParseResult, fileStat: tuple, gen: GenCSharp):
+        self.result = result
+        self.fileStat = fileStat
+        self.__gen = gen
+        self.__coverage = {}
+        self.__byEmoji = {}
+        self.__byName = {}
+        self.__bySearchTerm = {}
+
+        for e in result.emoji:
+            self.__byEmoji.setdefault(e.emoji, e)
+            self.__byName.setdefault(e.name, e)
+            for term in e.searchTerms:
+                self.__bySearchTerm.setdefault(term, []).append(e)
+
+    def lookup(self, key: str) -> Emoji:
+        return self.__byEmoji.get(key) or self.__byName.get(key)
+
+    def search(self, query: str) -> list:
+        terms = EmojiParser.genSearchTerms(query)
+        if len(terms) <= 0:
+            return []
+
+        matches = None
+        for term in terms:
+            found = {e.index: e for e in self.__bySearchTerm.get(term, [])}
+            matches = found if matches is None else {i: e for i, e in matches.items() if i in found}
+        return [matches[i] for i in sorted(matches)]
+
+    def isCovered(self, key: str) -> bool:
+        if not self.__gen:
+            raise ValueError("No font loaded, start the server with a font path to answer coverage queries")
+
+        if key in self.__coverage:
+            return self.__coverage[key]
+
+        e = self.lookup(key)
+        if e is None:
+            # Do not cache arbitrary client input, only known emoji:
+            return self.__gen.isEmojiSupportedByFont(Emoji([], key, "", [], [], None, None, None, "", -1), False)
+        covered = self.__gen.isEmojiSupportedByFont(e)
+        self.__coverage[key] = covered
+        return covered
+
+class EmojiServer:
+    """
+    A local lookup server keeping a parsed "emoji-test.txt" file, its indexes and the font in memory.
+
+    All queries are batched and get send as a JSON POST request:
+    /lookup   {"emoji": ["😀", "grinning face"]} -> {"results": [{...}, null]}
+    /search   {"queries": ["cat face"]}          -> {"results": [[{...}, ...]]}
+    /coverage {"emoji": ["😀"]}                   -> {"results": [true]}
+    GET /status returns the version and emoji count of the currently loaded file.
+
+    The source file gets polled for changes. Once its modification time and size stayed the same for two polls in a row (so it is
+    not being written any more), it gets parsed in the background and the new state replaces the old one in a single assignment,
+    so every request gets answered based on either the old or the new file, never a mix.
+    Files without a "# Version:" header or missing groups get rejected and the old state stays.
+
+    ...
+
+    Attributes
+    ----------
+    filepath : str
+        the path to the "emoji-test.txt" file
+
+    state : EmojiServerState
+        the currently served state
+
+    Methods
+    -------
+    serveForever()
+        starts the reload thread and handles requests until shutdown() gets called
+
+    shutdown()
+        stops the server and the reload thread
+    """
+
+    def __init__(self, filepath: str, fontPath: str=None, host: str="127.0.0.1", port: int=8080, pollInterval: float=1.0):
+        self.filepath = filepath
+        self.pollInterval = pollInterval
+        self.__gen = GenCSharp(fontPath, filepath) if fontPath else None
+        self.__stopEvent = threading.Event()
+        self.__failedStat = None
+        self.__pendingStat = None
+        self.state = self.__load(self.__getFileStat())
+
+        server = self
+        class Handler(EmojiRequestHandler):
+            emojiServer = server
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    def serveForever(self):
+        host, port = self.httpd.server_address[:2]
+        print("Emoji server listening on http://" + host + ":" + str(port))
+        threading.Thread(target=self.__watch, daemon=True).start()
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.__stopEvent.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reload(self) -> bool:
+        try:
+            fileStat = self.__getFileStat()
+        except OSError as e:
+            print("Failed to reload \"" + self.filepath + "\", keeping the old state: " + str(e))
+            return False
+
+        try:
+            self.state = self.__load(fileStat)
+            self.__failedStat = None
+            return True
+        except Exception as e:
+            # Remember the broken version, so it does not get parsed again on every poll:
+            self.__failedStat = fileStat
+            print("Failed to reload \"" + self.filepath + "\", keeping the old state: " + str(e))
+            return False
+
+    def __getFileStat(self) -> tuple:
+        stat = os.stat(self.filepath)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def __load(self, fileStat: tuple) -> EmojiServerState:
+        result = EmojiParser(filepath=self.filepath).parse()
+        if result is None:
+            raise Exception("Failed to parse \"" + self.filepath + "\"")
+
+        # The parser skips broken lines, so a half written file would otherwise replace a good one:
+        if result.versionMajor < 0:
+            raise Exception("No \"# Version:\" header found in \"" + self.filepath + "\"")
+        missingGroups = [group.name for group in Group if not any(e.group == group for e in result.emoji)]
+        if missingGroups:
+            raise Exception("Groups missing in \"" + self.filepath + "\": " + ", ".join(missingGroups))
+        return EmojiServerState(result, fileStat, self.__gen)
+
+    def __watch(self):
+        while not self.__stopEvent.wait(self.pollInterval):
+            try:
+                fileStat = self.__getFileStat()
+            except OSError:
+                continue
+            if fileStat == self.state.fileStat or fileStat == self.__failedStat:
+                self.__pendingStat = None
+                continue
+
+            # Only reload once the file did not change between two polls, it might still be written to:
+            if fileStat != self.__pendingStat:
+                self.__pendingStat = fileStat
+                continue
+            self.__pendingStat = None
+            print("Detected change of \"" + self.filepath + "\", reloading...")
+            self.reload()
+
+class EmojiRequestHandler(BaseHTTPRequestHandler):
+    emojiServer: EmojiServer = None
+
+    def do_GET(self):
+        if self.path != "/status":
+            self.__sendJson(404, {"error": "Unknown path: " + self.path})
+            return
+
+        state = self.emojiServer.state
+        self.__sendJson(200, {
+            "versionMajor": state.result.versionMajor,
+            "versionMinor": state.result.versionMinor,
+            "emoji": len(state.result.emoji),
+            "subgroups": len(state.result.subgroups)
+        })
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self.__sendJson(400, {"error": "Invalid JSON body: " + str(e)})
+            return
+        if not isinstance(body, dict):
+            self.__sendJson(400, {"error": "The JSON body has to be an object"})
+            return
+
+        # Grab the state once so a reload does not change it while answering the batch:
+        state = self.emojiServer.state
+        try:
+            if self.path == "/lookup":
+                results = [self.__emojiToDict(state.lookup(key)) for key in self.__getStringList(body, "emoji")]
+            elif self.path == "/search":
+                results = [[self.__emojiToDict(e) for e in state.search(query)] for query in self.__getStringList(body, "queries")]
+            elif self.path == "/coverage":
+                results = [state.isCovered(key) for key in self.__getStringList(body, "emoji")]
+            else:
+                self.__sendJson(404, {"error": "Unknown path: " + self.path})
+                return
+        except ValueError as e:
+            self.__sendJson(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.__sendJson(500, {"error": str(e)})
+            return
+        self.__sendJson(200, {"results": results})
+
+    def log_message(self, format, *args):
+        # Per request logging slows down batched clients considerably:
+        pass
+
+    def __getStringList(self, body: dict, field: str) -> list:
+        values = body.get(field, [])
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError("\"" + field + "\" has to be a list of strings")
+        return values
+
+    def __sendJson(self, code: int, obj):
+        data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __emojiToDict(self, emoji: Emoji) -> dict:
+        if emoji is None:
+            return None
+        return {
+            "codePoints": emoji.codePoints,
+            "emoji": emoji.emoji,
+            "name": emoji.name,
+            "searchTerms": emoji.searchTerms,
+            "skinTones": [tone.name for tone in emoji.skinTones],
+            "status": emoji.status.name,
+            "eNumber": emoji.eNumber,
+            "group": emoji.group.name,
+            "subgroup": emoji.subgroup,
+            "index": emoji.index
+        }
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Serves emoji lookup, search and font coverage queries for an emoji-test.txt file.")
+    argParser.add_argument("filepath", help="path to the emoji-test.txt file, gets reloaded on change")
+    argParser.add_argument("--font", help="path to the font used for coverage queries e.g. C:\\Windows\\Fonts\\seguiemj.ttf")
+    argParser.add_argument("--host", default="127.0.0.1")
+    argParser.add_argument("--port", type=int, default=8080)
+    args = argParser.parse_args()
+
+    server = EmojiServer(args.filepath, args.font, args.host, args.port)
+    try:
+        server.serveForever()
+    except KeyboardInterrupt:
+        server.shutdown()
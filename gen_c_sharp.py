@@ -1,17 +1,34 @@
-from emoji_parser import EmojiParseResult, Emoji, Status, SkinTone, Group
+from emoji_parser import EmojiParseResult, Emoji, Status, SkinTone, Group, CodePointRole
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from uharfbuzz import Face, Font, Buffer, ot_font_set_funcs, shape
 import sys
 
+# The generator of a shard worker process, gets created once per process by initShardWorker():
+shardWorkerGen = None
+
+def initShardWorker(fontPath: str, srcUrl: str, outDir: str):
+    global shardWorkerGen
+    shardWorkerGen = GenCSharp(fontPath, srcUrl, outDir)
+
+def genEmojiDeclarationsShardWorker(name: str, emoji: list) -> tuple:
+    # Only the shard gets send to the worker, the font gets loaded once per process by initShardWorker().
+    # The coverage results get send back, so the parent does not have to shape them again:
+    changed = shardWorkerGen.genEmojiDeclarationsShard(name, emoji)
+    return changed, {e.emoji: shardWorkerGen.isEmojiSupportedByFont(e) for e in emoji}
+
 class GenCSharp:
 
-    def __init__(self, fontPath: str, srcUrl: str):
+    def __init__(self, fontPath: str, srcUrl: str, outDir: str="out"):
         # Load font:
         with open(fontPath, 'rb') as fontfile:
             self.fontdata = fontfile.read()
 
+        self.fontPath = fontPath
         self.srcUrl = srcUrl
+        self.outDir = outDir
+        self.__fontSupportCache = {}
 
     def __genCamelCaseName(self, emoji: Emoji) -> str:
         name: str = "".join([s.capitalize() for s in emoji.searchTerms if s.isalnum()])
@@ -74,8 +91,90 @@ class GenCSharp:
 
         output += "\t}\n}\n"
         self.__writeAndCloseFile(outFile, output)
+        self.removeStaleEmojiDeclarationsShards(["Emoji-Emojis.cs"])
         print("Finished generating \"Emoji-Emojis.cs\".")
 
+    def genEmojiDeclarationsShards(self, result: EmojiParseResult, maxShardSize: int=None, workers: int=None):
+        """
+        Splits the SingleEmoji declarations across several "Emoji-Emojis-*.cs" partial class files instead of one "Emoji-Emojis.cs".
+
+        See splitEmojiDeclarationsShards() for how emoji get assigned to shards.
+        Shards (including the font coverage check) get generated by a pool of worker processes, each loading the font once.
+        workers defaults to the number of CPUs, with a single worker everything runs in this process.
+        Shards only get written in case their content changed.
+        """
+        print("Generating \"Emoji-Emojis-*.cs\" shards...")
+        shards = {}
+        for group in Group:
+            shards.update(self.splitEmojiDeclarationsShards(result.emoji, group, maxShardSize))
+
+        workers = min(workers or os.cpu_count() or 1, len(shards))
+        if workers <= 1:
+            changed = [self.genEmojiDeclarationsShard(name, shardEmoji) for name, shardEmoji in shards.items()]
+        else:
+            changed = []
+            with ProcessPoolExecutor(workers, initializer=initShardWorker, initargs=(self.fontPath, self.srcUrl, self.outDir)) as executor:
+                for shardChanged, fontSupport in executor.map(genEmojiDeclarationsShardWorker, shards.keys(), shards.values()):
+                    changed.append(shardChanged)
+                    self.__fontSupportCache.update(fontSupport)
+
+        self.removeStaleEmojiDeclarationsShards(shards.keys())
+        print("Finished generating " + str(len(shards)) + " \"Emoji-Emojis-*.cs\" shards (" + str(sum(changed)) + " changed).")
+
+    def splitEmojiDeclarationsShards(self, emoji: list, group: Group, maxShardSize: int=None) -> dict:
+        """
+        Returns a dict mapping shard file names to the list of fully-qualified and component emoji of the given group they declare.
+
+        Without maxShardSize the whole group ends up in "Emoji-Emojis-<Group>.cs".
+        With maxShardSize every subgroup gets its own "Emoji-Emojis-<Group>-<Subgroup>.cs" shard and subgroups with more than
+        maxShardSize emoji get split into "Emoji-Emojis-<Group>-<Subgroup>-<n>.cs" chunks of at most maxShardSize emoji.
+        The assignment only depends on the subgroup itself, so changes to one subgroup never move emoji of other subgroups.
+        """
+        if maxShardSize is not None and maxShardSize < 1:
+            raise ValueError("maxShardSize has to be at least 1, got: " + str(maxShardSize))
+
+        groupEmoji = [e for e in emoji if (e.status == Status.COMPONENT or e.status == Status.FULLY_QUALIFIED) and e.group == group]
+        if len(groupEmoji) <= 0:
+            return {}
+
+        groupName = self.__genGroupName(group)
+        if not maxShardSize:
+            return {"Emoji-Emojis-" + groupName + ".cs": groupEmoji}
+
+        subgroups = {}
+        for e in groupEmoji:
+            subgroups.setdefault(e.subgroup, []).append(e)
+
+        shards = {}
+        for subgroup, subgroupEmoji in subgroups.items():
+            name = "Emoji-Emojis-" + groupName + "-" + self.__genSubGroupCamelCaseName(subgroup)
+            if len(subgroupEmoji) <= maxShardSize:
+                shards[name + ".cs"] = subgroupEmoji
+                continue
+
+            for i in range(0, len(subgroupEmoji), maxShardSize):
+                shards[name + "-" + str(i // maxShardSize) + ".cs"] = subgroupEmoji[i:i + maxShardSize]
+        return shards
+
+    def removeStaleEmojiDeclarationsShards(self, names):
+        # Remove the monolithic file and shards from previous runs that would cause duplicate declarations:
+        if os.path.exists(self.outDir):
+            for name in os.listdir(self.outDir):
+                if name.startswith("Emoji-Emojis") and name.endswith(".cs") and not name in names:
+                    os.remove(os.path.join(self.outDir, name))
+
+    def genEmojiDeclarationsShard(self, name: str, emoji: list) -> bool:
+        output = ("namespace NeoSmart.Unicode\n"
+            "{\n"
+            + self.__genMachinegeneratedHeader()
+            + "\tpublic static partial class Emoji\n"
+            "\t{\n")
+
+        output += "\n".join([self.genEmojiString(e) for e in emoji])
+
+        output += "\t}\n}\n"
+        return self.__writeFileIfChanged(name, output)
+
     def genEmojiAllFile(self, result: EmojiParseResult):
         print("Generating \"Emoji-All.cs\"...")
         outFile = self.__openFile("Emoji-All.cs")
@@ -101,8 +200,35 @@ class GenCSharp:
         self.__writeAndCloseFile(outFile, output)
         print("Finished generating \"Emoji-All.cs\".")
 
+    def genCodePointsFile(self, result: EmojiParseResult):
+        print("Generating \"Emoji-CodePoints.cs\"...")
+        outFile = self.__openFile("Emoji-CodePoints.cs")
+
+        output = ("namespace NeoSmart.Unicode\n"
+            "{\n"
+            + self.__genMachinegeneratedHeader()
+            + "\tpublic static partial class Emoji\n"
+            "\t{\n"
+            "\t\tpublic static class CodePointRoles\n"
+            "\t\t{\n")
+        output += "".join("\t\t\tpublic const int " + role.name + " = " + str(role.value) + ";\n" for role in CodePointRole if role != CodePointRole.NONE)
+        output += ("\t\t}\n"
+            "\n"
+            "\t\t/// <summary>\n"
+            "\t\t/// Sorted, non overlapping code point ranges of all code points used in any emoji sequence.\n"
+            "\t\t/// Each range is stored as three values: first code point, last code point and its CodePointRoles flags.\n"
+            "\t\t/// <summary>\n"
+            "\t\tpublic static readonly int[] CodePointRanges = new int[] {\n")
+
+        for first, last, roles in result.getCodePointTable().ranges:
+            output += "\t\t\t" + hex(first) + ", " + hex(last) + ", " + str(roles.value) + ",\n"
+
+        output += "\t\t};\n\t}\n}\n"
+        self.__writeAndCloseFile(outFile, output)
+        print("Finished generating \"Emoji-CodePoints.cs\".")
+
     def genEmojiGroupFile(self, result: EmojiParseResult, group: Group):
-        groupName = "".join([s.lower().capitalize() for s in group.name.split("_")])
+        groupName = self.__genGroupName(group)
         print("Generating \"Emoji-" + groupName + ".cs\"...")
         outFile = self.__openFile("Emoji-" + groupName + ".cs")
 
@@ -128,6 +254,11 @@ class GenCSharp:
         print("Finished generating \"Emoji-" + groupName + ".cs\".")
 
     def __isEmojiSupportedByFont(self, emoji: Emoji) -> bool:
+        if not emoji.emoji in self.__fontSupportCache:
+            self.__fontSupportCache[emoji.emoji] = self.__shapeIsEmojiSupportedByFont(emoji)
+        return self.__fontSupportCache[emoji.emoji]
+
+    def __shapeIsEmojiSupportedByFont(self, emoji: Emoji) -> bool:
         # Load font (has to be done for call):
         face = Face(self.fontdata)
         font = Font(face)
@@ -161,6 +292,11 @@ class GenCSharp:
         # If there is a code point 0 => Emoji not fully supported by font:
         return all(info.codepoint != 0 and info.codepoint != 3 for info in infos)
     
+    def isEmojiSupportedByFont(self, emoji: Emoji, cache: bool=True) -> bool:
+        if not cache:
+            return self.__shapeIsEmojiSupportedByFont(emoji)
+        return self.__isEmojiSupportedByFont(emoji)
+
     def testIsEmojiSupportedByFont(self):
         self.__testEvalIsEmojiSupportedByFont("☹️", True)
         self.__testEvalIsEmojiSupportedByFont("👨‍👨‍👧‍👦", True)
@@ -222,20 +358,37 @@ class GenCSharp:
         self.__writeAndCloseFile(outFile, output)
         print("Finished generating \"Emoji-Basic.cs\".")
 
+    def __genGroupName(self, group: Group) -> str:
+        return "".join([s.lower().capitalize() for s in group.name.split("_")])
+
+    def __genSubGroupCamelCaseName(self, subgroup: str) -> str:
+        return "".join(part.capitalize() for part in self.__genSubGroupName(subgroup).split("_"))
+
     def __genSubGroupName(self, subgroup: str) -> str:
         parts = re.sub(r"[,.'’“”!():\-&]", " ", subgroup).split()
         return "_".join(part.upper() for part in parts if part)
 
     def __openFile(self, name: str):
-        if not os.path.exists("out"):
-            os.makedirs("out")
-        return open("out/" + name, "w", encoding="utf-8")
+        if not os.path.exists(self.outDir):
+            os.makedirs(self.outDir)
+        return open(os.path.join(self.outDir, name), "w", encoding="utf-8")
 
     def __writeAndCloseFile(self, file, text: str):
         # Replace \t with 4 spaces to match the VS identation:
         file.write(text.replace("\t", "    "))
         file.close()
 
+    def __writeFileIfChanged(self, name: str, text: str) -> bool:
+        # Keep the old file (and its timestamp) untouched so incremental builds skip it:
+        text = text.replace("\t", "    ")
+        path = os.path.join(self.outDir, name)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as oldFile:
+                if oldFile.read() == text:
+                    return False
+        self.__writeAndCloseFile(self.__openFile(name), text)
+        return True
+
     def genSubgroupsFile(self, result: EmojiParseResult):
         print("Generating \"Emoji-Subgroups.cs\"...")
         outFile = self.__openFile("Emoji-Subgroups.cs")
@@ -253,13 +406,19 @@ class GenCSharp:
         self.__writeAndCloseFile(outFile, output)
         print("Finished generating \"Subgroups.cs\".")
 
-    def gen(self, result: EmojiParseResult):
-        # Emoji-Emojis.cs
-        self.genEmojiDeclarationsFile(result)
+    def gen(self, result: EmojiParseResult, shardDeclarations: bool=False, maxShardSize: int=None):
+        if shardDeclarations:
+            # Emoji-Emojis-*.cs
+            self.genEmojiDeclarationsShards(result, maxShardSize)
+        else:
+            # Emoji-Emojis.cs
+            self.genEmojiDeclarationsFile(result)
         # Subgroups.cs
         self.genSubgroupsFile(result)
         # Emoji-All.cs
         self.genEmojiAllFile(result)
+        # Emoji-CodePoints.cs
+        self.genCodePointsFile(result)
         # Emoji-Basic.cs
         self.genEmojiBasicFile(result)
 
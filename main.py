@@ -1,11 +1,29 @@
 from emoji_parser import EmojiParser
+from emoji_pipeline import EmojiPipeline
 from gen_c_sharp import GenCSharp
+import argparse
+
+def positiveInt(s: str) -> int:
+    value = int(s)
+    if value < 1:
+        raise argparse.ArgumentTypeError("has to be at least 1, got: " + s)
+    return value
 
 if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Generates the C# emoji source files from the Unicode emoji-test.txt file.")
+    argParser.add_argument("--sharded", action="store_true", help="split the emoji declarations into one Emoji-Emojis-*.cs file per group")
+    argParser.add_argument("--maxShardSize", type=positiveInt, help="split sharded groups into one file per subgroup with at most this many emoji each")
+    argParser.add_argument("--pipelined", action="store_true", help="overlap download, parsing and generation (always sharded)")
+    args = argParser.parse_args()
+
     url = "https://unicode.org/Public/emoji/14.0/emoji-test.txt"
     parser = EmojiParser(url)
-    result = parser.parse()
 
     gen = GenCSharp(r"C:\Windows\Fonts\seguiemj.ttf", url)
     # gen.testIsEmojiSupportedByFont()
-    gen.gen(result)
\ No newline at end of file
+    if args.pipelined:
+        # Overlap download, parsing and generation (always generates sharded declarations):
+        EmojiPipeline(parser, gen, args.maxShardSize).run()
+    else:
+        result = parser.parse()
+        gen.gen(result, args.sharded or args.maxShardSize is not None, args.maxShardSize)